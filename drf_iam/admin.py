@@ -11,6 +11,10 @@ class PolicyAdmin(admin.ModelAdmin):
 
 class PoliciesInline(admin.TabularInline):
     model = Role.policies.through
+    autocomplete_fields = ('policy',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('role', 'policy')
 
 @admin.register(Role)
 class RoleAdmin(admin.ModelAdmin):
@@ -23,6 +27,8 @@ class RoleAdmin(admin.ModelAdmin):
 @admin.register(RolePolicy)
 class RolePolicyAdmin(admin.ModelAdmin):
     list_display = ('role', 'policy')
+    list_select_related = ('role', 'policy')
+    autocomplete_fields = ('role', 'policy')
     search_fields = ('role', 'policy')
     list_filter = ('role', 'policy')
 
@@ -4,8 +4,9 @@ import logging
 
 from django.apps import AppConfig
 from django.conf import settings
+from django.db import transaction
 from django.db.models.signals import post_migrate
-from typing import Any
+from typing import Any, Optional
 
 # Attempt to use the colorful logger setup, fallback to standard logger
 try:
@@ -28,26 +29,22 @@ class DrfIamConfig(AppConfig):
     name = "drf_iam"
     verbose_name = "DRF IAM"
 
-    _already_run_ready = False # Class attribute to track if ready() logic has run
-
     def ready(self) -> None:
         """Performs initialization tasks when the app is ready.
 
         Connects the permission loading utility to the post_migrate signal
         if DRF_IAM_AUTO_LOAD_PERMISSIONS setting is True.
-        Ensures this setup runs only once.
+        The receiver is bound to this app's sender only and deduplicated by
+        ``dispatch_uid``, so repeated ready() calls do not register it twice.
         """
-        if DrfIamConfig._already_run_ready:
-            return
-
         # Check Django settings for whether to auto-load permissions
         auto_load_enabled = getattr(settings, 'DRF_IAM_AUTO_LOAD_PERMISSIONS', True)
 
         if auto_load_enabled:
-            from drf_iam.utils.load_viewset_permissions import load_permissions_from_urls
+            def _sync_permissions() -> None:
+                """Runs the permission sync, logging instead of raising on failure."""
+                from drf_iam.utils.load_viewset_permissions import load_permissions_from_urls
 
-            def _robust_load_permissions(sender: AppConfig, **kwargs: Any) -> None:
-                """Signal receiver to load permissions, with error handling."""
                 try:
                     logger.info("🚀 Attempting to load/synchronize DRF-IAM permissions post-migrate...")
                     load_permissions_from_urls()
@@ -60,9 +57,25 @@ class DrfIamConfig(AppConfig):
                     # Decide if you want to re-raise. For post_migrate, often it's better
                     # to log and continue, rather than breaking the migration process.
 
+            def _robust_load_permissions(sender: AppConfig, plan: Optional[list] = None, **kwargs: Any) -> None:
+                """Signal receiver to load permissions, with error handling.
+
+                With DRF_IAM_SKIP_SYNC_WITHOUT_MIGRATIONS=True, skips the URL
+                scan when the migrate run applied no migrations.
+                The sync is deferred until any open transaction commits, so a
+                failure cannot abort it and its writes run outside of it.
+                """
+                # migrate is the only sync trigger, so skipping no-op runs is opt-in
+                skip_without_migrations = getattr(settings, 'DRF_IAM_SKIP_SYNC_WITHOUT_MIGRATIONS', False)
+                if skip_without_migrations and plan is not None and not plan:
+                    logger.info("⏭️  No migrations applied; skipping DRF-IAM permission synchronization.")
+                    return
+                transaction.on_commit(_sync_permissions)
+
             post_migrate.connect(
                 _robust_load_permissions,
                 sender=self, # Connect to migrations for this app only
+                weak=False, # The receiver is a closure; a weak reference dies when ready() returns
                 dispatch_uid="drf_iam.utils._robust_load_permissions",
             )
             logger.info(
@@ -72,5 +85,3 @@ class DrfIamConfig(AppConfig):
             logger.info(
                 f"{self.verbose_name}: 🚫 Permission auto-loading disabled via DRF_IAM_AUTO_LOAD_PERMISSIONS setting."
             )
-        
-        DrfIamConfig._already_run_ready = True
\ No newline at end of file
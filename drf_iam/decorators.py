@@ -1,5 +1,3 @@
-import functools
-
 def action_permissions_config(policy_name=None,policy_description=None,exclude_from_iam=False):
     """
     A decorator for viewset actions to attach custom arguments and keyword arguments.
@@ -15,13 +13,11 @@ def action_permissions_config(policy_name=None,policy_description=None,exclude_f
                 pass
     """
     def decorator(func_to_decorate):
-        @functools.wraps(func_to_decorate)
-        def wrapper_func(*view_args, **view_kwargs):
-            return func_to_decorate(*view_args, **view_kwargs)
+        # Attach the config to the function itself, like DRF's @action does,
+        # so the action is dispatched without an extra wrapper call.
+        func_to_decorate.policy_name = policy_name
+        func_to_decorate.exclude_from_iam = exclude_from_iam
+        func_to_decorate.policy_description = policy_description
 
-        setattr(wrapper_func, 'policy_name', policy_name)
-        setattr(wrapper_func, 'exclude_from_iam', exclude_from_iam)
-        setattr(wrapper_func, 'policy_description', policy_description)
-        
-        return wrapper_func
+        return func_to_decorate
     return decorator
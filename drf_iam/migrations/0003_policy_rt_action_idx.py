@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drf_iam", "0002_add_policy_name"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="policy",
+            index=models.Index(
+                fields=["resource_type", "action"], name="policy_rt_action_idx"
+            ),
+        ),
+    ]
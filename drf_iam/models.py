@@ -1,4 +1,33 @@
-from django.db import models
+import uuid
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+
+def _role_policy_version_key(role_id):
+    return f"drfiam:role:{role_id}:version"
+
+
+def role_policy_cache_key(role_id, resource_type):
+    """Returns the cache key holding a role's policy actions on a resource type.
+
+    Keys embed the role's current version token, so invalidating the role
+    retires all of its keys at once. The token is random rather than a
+    counter so an evicted version key never revives older entries.
+    """
+    version_key = _role_policy_version_key(role_id)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, None)
+        version = cache.get(version_key)
+    return f"drfiam:role:{role_id}:{version}:{resource_type}:actions"
+
+
+def invalidate_role_policy_cache(role_ids):
+    """Retires the cached policy actions of the given roles."""
+    cache.set_many({_role_policy_version_key(role_id): uuid.uuid4().hex for role_id in role_ids}, None)
 
 
 class Role(models.Model):
@@ -22,6 +51,9 @@ class Policy(models.Model):
 
     class Meta:
         unique_together = ('action', 'resource_type')
+        indexes = [
+            models.Index(fields=['resource_type', 'action'], name='policy_rt_action_idx'),
+        ]
         ordering = ['action', 'resource_type']
         verbose_name_plural = 'policies'
         verbose_name = 'policy'
@@ -38,4 +70,54 @@ class RolePolicy(models.Model):
         verbose_name = 'role policy'
 
     def __str__(self):
-        return f"{self.role.name} - {self.policy}"
+        # Only use related rows that are already loaded; never query for them
+        role = self.role.name if RolePolicy.role.is_cached(self) else f"role#{self.role_id}"
+        policy = self.policy if RolePolicy.policy.is_cached(self) else f"policy#{self.policy_id}"
+        return f"{role} - {policy}"
+
+
+def _invalidate_role_policy_cache_on_commit(role_ids, using=None):
+    # Readers see the old rows until commit; retiring the keys any earlier
+    # would let them cache the old grants again under the new token.
+    role_ids = [role_id for role_id in set(role_ids) if role_id is not None]
+    if role_ids:
+        transaction.on_commit(lambda: invalidate_role_policy_cache(role_ids), using=using)
+
+
+@receiver(pre_save, sender=RolePolicy)
+def _remember_previous_role(sender, instance, **kwargs):
+    # A grant moved to another role must also be revoked from the old one
+    instance._drf_iam_previous_role_id = None
+    if instance.pk is not None:
+        instance._drf_iam_previous_role_id = RolePolicy.objects.filter(
+            pk=instance.pk
+        ).values_list('role_id', flat=True).first()
+
+
+@receiver(post_save, sender=RolePolicy)
+@receiver(post_delete, sender=RolePolicy)
+def _invalidate_role_policy_cache_on_change(sender, instance, using=None, **kwargs):
+    # Only role ids are needed, so cascaded deletes cost no extra queries
+    _invalidate_role_policy_cache_on_commit(
+        [instance.role_id, getattr(instance, '_drf_iam_previous_role_id', None)], using
+    )
+
+
+@receiver(post_save, sender=Policy)
+def _invalidate_role_policy_cache_on_policy_save(sender, instance, created, using=None, **kwargs):
+    if created:
+        return
+    # Keys are retired per role, so an edited action or resource_type drops
+    # the cached grants for both its old and new values
+    _invalidate_role_policy_cache_on_commit(
+        RolePolicy.objects.filter(policy=instance).values_list('role_id', flat=True), using
+    )
+
+
+@receiver(m2m_changed, sender=Role.policies.through)
+def _invalidate_role_policy_cache_on_m2m_change(sender, instance, action, reverse, pk_set, using=None, **kwargs):
+    # add() bulk-inserts through rows without post_save; remove() and clear()
+    # delete them one by one and are covered by the post_delete receiver.
+    if action != 'post_add' or not pk_set:
+        return
+    _invalidate_role_policy_cache_on_commit(pk_set if reverse else [instance.pk], using)
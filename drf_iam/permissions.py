@@ -1,16 +1,19 @@
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import permissions
 
+from drf_iam.models import RolePolicy, role_policy_cache_key
+
 class DRFIamPermission(permissions.IsAuthenticated):
     def has_permission(self, request, view):
         user = request.user
-        role = getattr(user, 'role', None)
-        if not role:
-            return False
-        if not hasattr(user, '_cached_policy_actions'):
-            user._cached_policy_actions = set(
-                role.policies.values_list('action', flat=True)
-            )
-        policy_actions = user._cached_policy_actions
+        # Prefer the raw foreign key so the Role row is never loaded
+        role_id = getattr(user, 'role_id', None)
+        if role_id is None:
+            role = getattr(user, 'role', None)
+            if not role:
+                return False
+            role_id = role.pk
         # Resolve view name
         view_name = getattr(view, 'iam_policy_name', None)
         if not view_name:
@@ -19,6 +22,22 @@ class DRFIamPermission(permissions.IsAuthenticated):
 
         # Resolve action (DRF view.action or fallback to HTTP method)
         action = getattr(view, 'action', request.method.lower())
-        policy_action = f"{view_name}:{action}"
+        # DRF sets view.action to None for methods the route does not map
+        if not isinstance(action, str):
+            return False
+
+        cache_key = role_policy_cache_key(role_id, view_name)
+        policy_actions = cache.get(cache_key)
+        if policy_actions is None:
+            policy_actions = frozenset(
+                RolePolicy.objects.filter(
+                    role_id=role_id, policy__resource_type=view_name
+                ).order_by().values_list('policy__action', flat=True)
+            )
+            cache.set(
+                cache_key,
+                policy_actions,
+                getattr(settings, 'DRF_IAM_POLICY_CACHE_TIMEOUT', 300)
+            )
 
-        return policy_action in policy_actions
+        return action in policy_actions
@@ -1,3 +1,227 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.db.models.signals import post_migrate
+from django.apps import apps
+
+from rest_framework import routers, viewsets
+from rest_framework.decorators import action
+
+from drf_iam.decorators import action_permissions_config
+from drf_iam.models import Policy, Role, RolePolicy
+from drf_iam.permissions import DRFIamPermission
+from drf_iam.utils.load_viewset_permissions import get_viewset_actions, load_permissions_from_urls
+
+
+class WidgetViewSet(viewsets.ViewSet):
+    iam_policy_name = 'iam_test_widget'
+    drf_iam_permissions = {'restore': {'description': 'Restores archived widgets'}}
+
+    def list(self, request):
+        pass
+
+    @action_permissions_config(policy_name='Archive Widgets')
+    @action(detail=False)
+    def archive(self, request):
+        pass
+
+    @action_permissions_config(policy_name='Restore Widgets')
+    @action(detail=False)
+    def restore(self, request):
+        pass
+
+
+class BaseGadgetViewSet(viewsets.ViewSet):
+    def list(self, request):
+        pass
+
+    @action(detail=False)
+    def export(self, request):
+        pass
+
+    @action(detail=False)
+    def stats(self, request):
+        pass
+
+
+class GadgetViewSet(BaseGadgetViewSet):
+    # A plain method shadows the inherited action
+    def export(self, request):
+        pass
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        pass
+
+
+router = routers.SimpleRouter()
+router.register('widgets', WidgetViewSet, basename='widget')
+urlpatterns = router.urls
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DRFIamPermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name='editor')
+        self.list_policy = Policy.objects.create(action='list', resource_type='iam_test_resource')
+
+    def has_permission(self, resource_type='iam_test_resource', action='list', role=None):
+        role = role or self.role
+        request = SimpleNamespace(user=SimpleNamespace(role_id=role.pk), method='GET')
+        view = SimpleNamespace(iam_policy_name=resource_type, action=action)
+        return DRFIamPermission().has_permission(request, view)
+
+    def test_grant_then_revoke(self):
+        self.assertFalse(self.has_permission())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grant = RolePolicy.objects.create(role=self.role, policy=self.list_policy)
+        self.assertTrue(self.has_permission())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grant.delete()
+        self.assertFalse(self.has_permission())
+
+    def test_m2m_add_and_remove(self):
+        self.assertFalse(self.has_permission())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.policies.add(self.list_policy)
+        self.assertTrue(self.has_permission())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.policies.remove(self.list_policy)
+        self.assertFalse(self.has_permission())
+
+    def test_repointing_grant_to_another_policy_revokes_old_one(self):
+        grant = RolePolicy.objects.create(role=self.role, policy=self.list_policy)
+        other_policy = Policy.objects.create(action='list', resource_type='iam_test_other')
+        self.assertTrue(self.has_permission())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grant.policy = other_policy
+            grant.save()
+        self.assertFalse(self.has_permission())
+        self.assertTrue(self.has_permission(resource_type='iam_test_other'))
+
+    def test_moving_grant_to_another_role_revokes_old_role(self):
+        grant = RolePolicy.objects.create(role=self.role, policy=self.list_policy)
+        other_role = Role.objects.create(name='viewer')
+        self.assertTrue(self.has_permission())
+        self.assertFalse(self.has_permission(role=other_role))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grant.role = other_role
+            grant.save()
+        self.assertFalse(self.has_permission())
+        self.assertTrue(self.has_permission(role=other_role))
+
+    def test_changing_policy_resource_type_revokes_old_resource(self):
+        RolePolicy.objects.create(role=self.role, policy=self.list_policy)
+        self.assertTrue(self.has_permission())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.list_policy.resource_type = 'iam_test_other'
+            self.list_policy.save()
+        self.assertFalse(self.has_permission())
+        self.assertTrue(self.has_permission(resource_type='iam_test_other'))
+
+    def test_unmapped_action_is_denied(self):
+        RolePolicy.objects.create(role=self.role, policy=self.list_policy)
+        self.assertFalse(self.has_permission(action=None))
+
+    def test_user_without_role_is_denied(self):
+        request = SimpleNamespace(user=SimpleNamespace(role_id=None, role=None), method='GET')
+        view = SimpleNamespace(iam_policy_name='iam_test_resource', action='list')
+        self.assertFalse(DRFIamPermission().has_permission(request, view))
+
+    def _count_policy_delete_queries(self, count):
+        policies = [
+            Policy.objects.create(action=f'stale_{count}_{i}', resource_type='iam_test_resource')
+            for i in range(count)
+        ]
+        for policy in policies:
+            RolePolicy.objects.create(role=self.role, policy=policy)
+        with CaptureQueriesContext(connection) as queries:
+            Policy.objects.filter(id__in=[p.id for p in policies]).delete()
+        return len(queries)
+
+    def test_policy_delete_queries_do_not_grow_with_assignments(self):
+        self.assertEqual(self._count_policy_delete_queries(1), self._count_policy_delete_queries(5))
+
+
+class DRFIamPostMigrateTests(TestCase):
+    def test_post_migrate_runs_permission_sync(self):
+        app_config = apps.get_app_config('drf_iam')
+        with mock.patch('drf_iam.utils.load_viewset_permissions.load_permissions_from_urls') as load_permissions:
+            with self.captureOnCommitCallbacks(execute=True):
+                post_migrate.send(
+                    sender=app_config, app_config=app_config, verbosity=0, interactive=False,
+                    using=connection.alias, apps=apps, plan=[],
+                )
+        load_permissions.assert_called_once_with()
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class PermissionLoaderTests(TestCase):
+    def widget_policies(self):
+        return dict(
+            Policy.objects.filter(resource_type='iam_test_widget').values_list('action', 'description')
+        )
+
+    def test_sync_creates_policies(self):
+        load_permissions_from_urls()
+        self.assertEqual(self.widget_policies(), {
+            'list': 'Allows to list for iam test widget',
+            'archive': 'Allows to archive for iam test widget',
+            'restore': 'Restores archived widgets',
+        })
+        self.assertEqual(
+            Policy.objects.get(resource_type='iam_test_widget', action='list').policy_name,
+            'List Iam Test Widget'
+        )
+
+    def test_sync_updates_changed_policies(self):
+        load_permissions_from_urls()
+        policy = Policy.objects.get(resource_type='iam_test_widget', action='list')
+        Policy.objects.filter(pk=policy.pk).update(policy_name='Stale', description='Stale')
+
+        load_permissions_from_urls()
+        policy.refresh_from_db()
+        self.assertEqual(policy.policy_name, 'List Iam Test Widget')
+        self.assertEqual(policy.description, 'Allows to list for iam test widget')
+
+    def test_sync_deletes_stale_policies(self):
+        Policy.objects.create(action='destroy', resource_type='iam_test_widget')
+        Policy.objects.create(action='list', resource_type='iam_test_removed')
+
+        load_permissions_from_urls()
+        self.assertNotIn('destroy', self.widget_policies())
+        self.assertFalse(Policy.objects.filter(resource_type='iam_test_removed').exists())
+
+    def test_sync_without_changes_only_reads_policies(self):
+        load_permissions_from_urls()
+        with self.assertNumQueries(1):
+            load_permissions_from_urls()
+
+    def test_get_viewset_actions_follows_attribute_lookup(self):
+        # The inherited export action is shadowed by a plain method, stats is overridden as an action
+        self.assertEqual(get_viewset_actions(GadgetViewSet), frozenset({'list', 'stats'}))
+        self.assertEqual(get_viewset_actions(BaseGadgetViewSet), frozenset({'list', 'export', 'stats'}))
+
+    def test_decorator_without_description_uses_default(self):
+        load_permissions_from_urls()
+        policy = Policy.objects.get(resource_type='iam_test_widget', action='archive')
+        self.assertEqual(policy.policy_name, 'Archive Widgets')
+        self.assertEqual(policy.description, 'Allows to archive for iam test widget')
+
+    def test_decorator_without_description_falls_back_to_dict_entry(self):
+        load_permissions_from_urls()
+        policy = Policy.objects.get(resource_type='iam_test_widget', action='restore')
+        self.assertEqual(policy.policy_name, 'Restore Widgets')
+        self.assertEqual(policy.description, 'Restores archived widgets')
@@ -1,9 +1,15 @@
-import inspect
+import functools
 import logging
+import sys
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Dict, Any, Set, Tuple, Iterator, Type, Optional
+from types import FunctionType
+from typing import List, Dict, Any, Set, FrozenSet, Tuple, Iterator, Type, Optional
 
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
 from django.urls import get_resolver, URLPattern, URLResolver
 from rest_framework.views import APIView
 from rest_framework.viewsets import ViewSetMixin
@@ -13,8 +19,14 @@ from .logging_utils import setup_colorful_logger
 
 logger = setup_colorful_logger("drf_iam.permissions", level=logging.INFO)
 
+# dataclass(slots=True) drops the per-instance __dict__ but needs Python 3.10+
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+# Sentinel telling "attribute not set" apart from falsy values in getattr() lookups
+_MISSING = object()
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class PolicyDetail:
     """Represents the details of a policy to be created or updated."""
     action: str
@@ -42,25 +54,83 @@ def is_api_view(cls: Any) -> bool:
     return isinstance(cls, type) and issubclass(cls, APIView)
 
 
-def get_viewset_actions(viewset_cls: Type[ViewSetMixin]) -> Set[str]:
-    """Extracts all actions (default and custom) from a ViewSet class.
-    
-    Checks Django settings for 'DRF_IAM_DEFAULT_VIEWSET_ACTIONS'.
+@functools.lru_cache(maxsize=None)
+def _is_relevant_viewset(cls: Any) -> bool:
+    """Checks if the given class is a DRF ViewSet or APIView, cached per class."""
+    return isinstance(cls, type) and (issubclass(cls, ViewSetMixin) or issubclass(cls, APIView))
+
+
+@functools.lru_cache(maxsize=None)
+def _viewset_basename(viewset_cls: Type[Any]) -> str:
+    """Returns the resource type name used for a viewset's policies."""
+    return getattr(viewset_cls, "iam_policy_name", None) or viewset_cls.__name__.lower().replace('viewset', '')
+
+
+@functools.lru_cache(maxsize=None)
+def _is_excluded_viewset(viewset_cls: Type[Any]) -> bool:
+    """Checks if a viewset opted out of IAM policies."""
+    return bool(getattr(viewset_cls, "drf_iam_exclude_from_permissions", False))
+
+
+_default_viewset_actions: Optional[FrozenSet[str]] = None
+
+
+def get_default_viewset_actions() -> FrozenSet[str]:
+    """Returns the default actions checked on every ViewSet.
+
+    Reads Django settings for 'DRF_IAM_DEFAULT_VIEWSET_ACTIONS' once; the
+    snapshot is dropped whenever that setting changes (e.g. in tests).
     """
-    actions: Set[str] = set()
+    global _default_viewset_actions
+    if _default_viewset_actions is None:
+        fallback_default_actions = {
+            'list', 'retrieve', 'create', 'update', 'partial_update', 'destroy'
+        }
+        _default_viewset_actions = frozenset(
+            getattr(settings, 'DRF_IAM_DEFAULT_VIEWSET_ACTIONS', fallback_default_actions)
+        )
+    return _default_viewset_actions
 
-    fallback_default_actions = {
-        'list', 'retrieve', 'create', 'update', 'partial_update', 'destroy'
-    }
-    default_actions = getattr(settings, 'DRF_IAM_DEFAULT_VIEWSET_ACTIONS', fallback_default_actions)
 
-    for action_name in default_actions:
-        if hasattr(viewset_cls, action_name):
-            actions.add(action_name)
-    for name, method in inspect.getmembers(viewset_cls, predicate=inspect.isfunction):
-        if hasattr(method, 'mapping'):
-            actions.add(name)
-    return actions
+@receiver(setting_changed)
+def _reset_default_viewset_actions(setting: str, **kwargs: Any) -> None:
+    global _default_viewset_actions
+    if setting == 'DRF_IAM_DEFAULT_VIEWSET_ACTIONS':
+        _default_viewset_actions = None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_viewset_actions(viewset_cls: Type[ViewSetMixin], default_actions: FrozenSet[str]) -> FrozenSet[str]:
+    actions: Set[str] = set()
+
+    # Walk the class dicts directly instead of inspect.getmembers(), which
+    # getattr()s and sorts every attribute. The first class in the MRO
+    # defining a name wins, as with normal attribute lookup.
+    seen_names: Set[str] = set()
+    for base in viewset_cls.__mro__:
+        for name, value in base.__dict__.items():
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+            if isinstance(value, FunctionType) and hasattr(value, 'mapping'):
+                actions.add(name)
+    # Default actions count when defined anywhere along the MRO
+    actions.update(default_actions & seen_names)
+    return frozenset(actions)
+
+
+def get_viewset_actions(
+        viewset_cls: Type[ViewSetMixin],
+        default_actions: Optional[FrozenSet[str]] = None
+) -> FrozenSet[str]:
+    """Extracts all actions (default and custom) from a ViewSet class.
+    
+    ``default_actions`` defaults to ``get_default_viewset_actions()``.
+    Results are cached per (class, default actions) pair.
+    """
+    if default_actions is None:
+        default_actions = get_default_viewset_actions()
+    return _get_viewset_actions(viewset_cls, default_actions)
 
 
 class PermissionLoader:
@@ -70,26 +140,33 @@ class PermissionLoader:
         self.urlpatterns: List[Any] = get_resolver().url_patterns
         self.desired_policies: List[PolicyDetail] = []
         self.current_db_policies: List[PolicyDetail] = []
+        self.default_actions: FrozenSet[str] = get_default_viewset_actions()
 
     def _extract_viewsets_from_urlpatterns(
             self,
-            urlpatterns: List[Any],
-            prefix: str = ''
+            urlpatterns: List[Any]
     ) -> Iterator[Dict[str, Any]]:
-        """Recursively extracts ViewSet details from Django URL patterns."""
-        for pattern in urlpatterns:
+        """Extracts ViewSet details from Django URL patterns.
+
+        Walks nested resolvers depth-first with an explicit stack, in the
+        same order as a recursive walk. Each viewset class is yielded once,
+        for the first route pointing at it.
+        """
+        seen_viewsets: Set[Type[Any]] = set()
+        stack = deque(urlpatterns)
+        while stack:
+            pattern = stack.popleft()
             if isinstance(pattern, URLResolver):
-                yield from self._extract_viewsets_from_urlpatterns(
-                    pattern.url_patterns, prefix + str(pattern.pattern)
-                )
+                stack.extendleft(reversed(pattern.url_patterns))
             elif isinstance(pattern, URLPattern):
                 callback = pattern.callback
                 viewset_class = getattr(callback, 'cls', None)
-                if (is_viewset(viewset_class) or is_api_view(viewset_class)) and not getattr(viewset_class,
-                                                                                         "drf_iam_exclude_from_permissions",
-                                                                                         False):
+                # Routers register several URLs (list, detail, ...) per viewset
+                if viewset_class is None or viewset_class in seen_viewsets:
+                    continue
+                if _is_relevant_viewset(viewset_class) and not _is_excluded_viewset(viewset_class):
+                    seen_viewsets.add(viewset_class)
                     yield {
-                        'prefix': prefix,
                         'pattern': pattern.pattern,
                         'viewset': viewset_class,
                         'callback': callback,
@@ -109,52 +186,54 @@ class PermissionLoader:
         Raises:
             Exception: If any attribute is defined in both locations.
         """
-        conflicts: List[str] = []
-        error_message_template = (
-            "Attribute '{}' for action '{}' on ViewSet '{}' cannot be defined in both "
-            "'drf_iam_permissions' dictionary and as a direct method attribute (e.g., via decorator). "
-            "Please choose a single source of truth."
-        )
+        # Nothing configured in drf_iam_permissions means nothing can conflict
+        if not iam_perms_for_action:
+            return
 
-        viewset_name = action_method.__self__.__class__.__name__ if hasattr(action_method,
-                                                                            '__self__') else 'UnknownViewSet'
+        conflicting_attributes: List[str] = []
 
-        # Check for 'policy_name'
-        if iam_perms_for_action.get("policy_name") and hasattr(action_method, 'policy_name'):
-            conflicts.append(error_message_template.format('policy_name', action_name, viewset_name))
+        # Check for 'policy_name' (a None attribute, the decorator default, counts as unset)
+        if iam_perms_for_action.get("policy_name") and getattr(action_method, 'policy_name', None) is not None:
+            conflicting_attributes.append('policy_name')
 
         # Check for 'policy_description' (key 'description' in dict, attribute 'policy_description' on method)
-        if iam_perms_for_action.get("description") and hasattr(action_method, 'policy_description'):
-            conflicts.append(
-                error_message_template.format('policy_description (dict key "description")', action_name, viewset_name))
+        if iam_perms_for_action.get("description") and \
+                getattr(action_method, 'policy_description', None) is not None:
+            conflicting_attributes.append('policy_description (dict key "description")')
 
         # Check for 'exclude_from_iam'
         if iam_perms_for_action.get("exclude_from_iam") is not None and \
                 hasattr(action_method, 'exclude_from_iam'):
-            conflicts.append(error_message_template.format('exclude_from_iam', action_name, viewset_name))
+            conflicting_attributes.append('exclude_from_iam')
 
-        if conflicts:
-            raise Exception("\n".join(conflicts))
+        if not conflicting_attributes:
+            return
+
+        error_message_template = (
+            "Attribute '{}' for action '{}' on ViewSet '{}' cannot be defined in both "
+            "'drf_iam_permissions' dictionary and as a direct method attribute (e.g., via decorator). "
+            "Please choose a single source of truth."
+        )
+        viewset_name = action_method.__self__.__class__.__name__ if hasattr(action_method,
+                                                                            '__self__') else 'UnknownViewSet'
+        raise Exception("\n".join(
+            error_message_template.format(attribute, action_name, viewset_name)
+            for attribute in conflicting_attributes
+        ))
 
     def _generate_policy_details_from_viewsets(self) -> None:
         """Generates a list of desired PolicyDetail objects from URL patterns."""
-        raw_policy_details: List[Dict[str, Any]] = []
-        resource_type_name_cache: Dict[Type[ViewSetMixin], str] = {}
+        # Keyed by (action, resource_type): viewsets sharing an iam_policy_name
+        # collapse into one policy, the last one discovered winning
+        desired: Dict[Tuple[str, str], PolicyDetail] = {}
 
         for viewset_info in self._extract_viewsets_from_urlpatterns(self.urlpatterns):
             viewset_cls = viewset_info['callback'].cls
-            actions = get_viewset_actions(viewset_cls)
-
-            # Cache resource type name
-            if viewset_cls not in resource_type_name_cache:
-                resource_type_name_cache[viewset_cls] = getattr(
-                    viewset_cls,
-                    "iam_policy_name",
-                    None
-                ) or viewset_cls.__name__.lower().replace('viewset',
-                                                          '')
-
-            resource_type_name = resource_type_name_cache[viewset_cls]
+            actions = get_viewset_actions(viewset_cls, self.default_actions)
+            resource_type_name = _viewset_basename(viewset_cls)
+            # Loop-invariant parts of the generated default name and description
+            resource_type_human = resource_type_name.replace('_', ' ')
+            resource_type_title = resource_type_human.title()
 
             drf_iam_permissions = getattr(viewset_cls, "drf_iam_permissions", {})
 
@@ -171,169 +250,143 @@ class PermissionLoader:
 
                 # Determine if the action should be excluded
                 # Precedence: method attribute > dict setting > default (False)
-                excluded = False
-                if hasattr(action_method, 'exclude_from_iam'):
-                    excluded = getattr(action_method, 'exclude_from_iam')
-                elif "exclude_from_iam" in iam_perms_for_action:
+                excluded = getattr(action_method, 'exclude_from_iam', _MISSING)
+                if excluded is _MISSING:
                     excluded = iam_perms_for_action.get("exclude_from_iam", False)
 
                 if excluded:
                     logger.debug(
-                        f"Action '{action_name}' on ViewSet "
-                        f"'{viewset_cls.__name__}' is excluded from IAM policies."
+                        "Action '%s' on ViewSet '%s' is excluded from IAM policies.",
+                        action_name, viewset_cls.__name__
                     )
                     continue
 
                 # Determine policy_name
                 # Precedence: method attribute > dict setting > default generated name
-                policy_name_str: str
-                if hasattr(action_method, 'policy_name'):
-                    policy_name_str = getattr(action_method, 'policy_name')
-                elif "policy_name" in iam_perms_for_action:
-                    policy_name_str = iam_perms_for_action["policy_name"]
-                else:
-                    policy_name_str = f"{action_name.replace('_', ' ').title()} {resource_type_name.replace('_', ' ').title()}"
+                # None (the decorator's default) counts as unset at every level
+                policy_name_str = getattr(action_method, 'policy_name', _MISSING)
+                if policy_name_str is None or policy_name_str is _MISSING:
+                    policy_name_str = iam_perms_for_action.get("policy_name", _MISSING)
+                if policy_name_str is None or policy_name_str is _MISSING:
+                    policy_name_str = f"{action_name.replace('_', ' ').title()} {resource_type_title}"
 
                 # Determine description
                 # Precedence: method attribute 'policy_description' > dict setting 'description' > default generated description
-                description_str: str
-                if hasattr(action_method, 'policy_description'):
-                    description_str = getattr(action_method, 'policy_description')
-                elif "description" in iam_perms_for_action:
-                    description_str = iam_perms_for_action["description"]
-                else:
-                    description_str = f"Allows to {action_name.replace('_', ' ')} for {resource_type_name.replace('_', ' ')}"
-
-                raw_policy_details.append({
-                    "action": action_name,  # Just the action name
-                    "resource_type": resource_type_name,
-                    "policy_name": policy_name_str,
-                    "description": description_str,
-                })
-
-        # Remove duplicates and create PolicyDetail objects
-        # Ensures that if multiple URL patterns point to the same viewset action,
-        # we only consider one policy detail for it based on action and resource_type.
-        unique_policy_details_set = {
-            (p["action"], p["resource_type"]): p for p in raw_policy_details
-        }.values()
-
-        self.desired_policies = [
-            PolicyDetail(
-                action=p["action"],
-                resource_type=p["resource_type"],
-                policy_name=p["policy_name"],
-                description=p["description"],
-            )
-            for p in unique_policy_details_set
-        ]
+                description_str = getattr(action_method, 'policy_description', _MISSING)
+                if description_str is None or description_str is _MISSING:
+                    description_str = iam_perms_for_action.get("description", _MISSING)
+                if description_str is None or description_str is _MISSING:
+                    description_str = f"Allows to {action_name.replace('_', ' ')} for {resource_type_human}"
+
+                desired[(action_name, resource_type_name)] = PolicyDetail(
+                    action=action_name,  # Just the action name
+                    resource_type=resource_type_name,
+                    policy_name=policy_name_str,
+                    description=description_str,
+                )
+
+        self.desired_policies = list(desired.values())
 
     def _get_current_policies_from_db(self) -> None:
-        """Fetches all current policies from the database."""
+        """Fetches all current policies from the database.
+
+        Only the five columns the diff needs are selected, and the model's
+        default ordering is cleared since the rows are indexed by key anyway.
+        """
         self.current_db_policies = [
             PolicyDetail(
-                id=p.id,
-                action=p.action,
-                resource_type=p.resource_type,
-                policy_name=p.policy_name,
-                description=p.description,
+                id=policy_id,
+                action=action,
+                resource_type=resource_type,
+                policy_name=policy_name,
+                description=description,
             )
-            for p in Policy.objects.all()
+            for policy_id, action, resource_type, policy_name, description in Policy.objects.order_by().values_list(
+                'id', 'action', 'resource_type', 'policy_name', 'description'
+            ).iterator(chunk_size=2000)
         ]
 
     def _calculate_policy_changes(
             self
-    ) -> Tuple[List[PolicyDetail], List[PolicyDetail], List[PolicyDetail]]:
-        """Compares desired and current policies to determine changes."""
-        desired_set = set(self.desired_policies)
-        current_set = set(self.current_db_policies)
-
-        to_create = list(desired_set - current_set)
-
-        policies_to_delete_with_id: List[PolicyDetail] = []
-        current_map_for_delete = {(p.action, p.resource_type): p.id for p in self.current_db_policies if
-                                  p.id is not None}
-        policies_to_delete_stubs = current_set - desired_set
-        for policy_stub in policies_to_delete_stubs:
-            policy_id = current_map_for_delete.get((policy_stub.action, policy_stub.resource_type))
-            if policy_id is not None:
-                policies_to_delete_with_id.append(
-                    PolicyDetail(action=policy_stub.action, resource_type=policy_stub.resource_type, policy_name='',
-                                 description='', id=policy_id))
-
-        to_update: List[PolicyDetail] = []
-        current_map_for_update = {(p.action, p.resource_type): p for p in self.current_db_policies}
-
-        for desired_policy in current_set & desired_set:
-            current_policy_match = current_map_for_update.get((desired_policy.action, desired_policy.resource_type))
-            if current_policy_match and (
+    ) -> Tuple[List[PolicyDetail], List[int], List[Policy]]:
+        """Compares desired and current policies to determine changes.
+
+        Returns the policies to create, the ids of policies to delete and
+        the Policy instances to pass to bulk_update().
+        """
+        current_by_key = {(p.action, p.resource_type): p for p in self.current_db_policies}
+        desired_by_key = {(p.action, p.resource_type): p for p in self.desired_policies}
+        current_keys, desired_keys = current_by_key.keys(), desired_by_key.keys()
+
+        to_create = [desired_by_key[key] for key in desired_keys - current_keys]
+
+        policy_ids_to_delete: List[int] = [
+            current_by_key[key].id
+            for key in current_keys - desired_keys
+            if current_by_key[key].id is not None
+        ]
+
+        to_update: List[Policy] = []
+        for key in current_keys & desired_keys:
+            current_policy_match, desired_policy = current_by_key[key], desired_by_key[key]
+            if (
                     current_policy_match.policy_name != desired_policy.policy_name or
                     current_policy_match.description != desired_policy.description
             ):
-                to_update.append(PolicyDetail(
+                to_update.append(Policy(
                     id=current_policy_match.id,
                     action=desired_policy.action,
                     resource_type=desired_policy.resource_type,
                     policy_name=desired_policy.policy_name,
                     description=desired_policy.description
                 ))
-        return to_create, policies_to_delete_with_id, to_update
+        return to_create, policy_ids_to_delete, to_update
 
     def _apply_policy_changes(
             self,
             policies_to_create: List[PolicyDetail],
-            policies_to_delete: List[PolicyDetail],
-            policies_to_update: List[PolicyDetail],
+            policy_ids_to_delete: List[int],
+            policies_to_update: List[Policy],
     ) -> None:
-        """Applies the calculated policy changes to the database."""
-        if policies_to_delete:
-            delete_ids = [p.id for p in policies_to_delete if p.id is not None]
-            if delete_ids:
-                Policy.objects.filter(id__in=delete_ids).delete()
-                logger.info(f"🗑️  Deleted {len(delete_ids)} policies.")
-
-        if policies_to_create:
-            Policy.objects.bulk_create([
-                Policy(
-                    action=p.action,
-                    resource_type=p.resource_type,
-                    policy_name=p.policy_name,
-                    description=p.description
-                ) for p in policies_to_create
-            ])
-            logger.info(f"✨ Created {len(policies_to_create)} new policies.")
-
-        if policies_to_update:
-            update_batch = []
-            for p_update in policies_to_update:
-                if p_update.id is not None:
-                    policy_obj = Policy(
-                        id=p_update.id,
-                        action=p_update.action,
-                        resource_type=p_update.resource_type,
-                        policy_name=p_update.policy_name,
-                        description=p_update.description
-                    )
-                    update_batch.append(policy_obj)
-
-            if update_batch:
-                Policy.objects.bulk_update(update_batch, fields=['policy_name', 'description'])
-                logger.info(f"🔄 Updated {len(update_batch)} policies.")
+        """Applies the calculated policy changes to the database in a single transaction."""
+        with transaction.atomic():
+            if policy_ids_to_delete:
+                Policy.objects.filter(id__in=policy_ids_to_delete).delete()
+                logger.info("🗑️  Deleted %d policies.", len(policy_ids_to_delete))
+
+            if policies_to_create:
+                Policy.objects.bulk_create([
+                    Policy(
+                        action=p.action,
+                        resource_type=p.resource_type,
+                        policy_name=p.policy_name,
+                        description=p.description
+                    ) for p in policies_to_create
+                ], batch_size=500)
+                logger.info("✨ Created %d new policies.", len(policies_to_create))
+
+            if policies_to_update:
+                Policy.objects.bulk_update(policies_to_update, fields=['policy_name', 'description'], batch_size=500)
+                logger.info("🔄 Updated %d policies.", len(policies_to_update))
 
     def sync_permissions(self) -> None:
         """Main method to synchronize permissions."""
         logger.info("🚀 Starting permission synchronization...")
 
         self._generate_policy_details_from_viewsets()
-        logger.info(f"🔍 Discovered {len(self.desired_policies)} desired policies from URL patterns.")
+        logger.info("🔍 Discovered %d desired policies from URL patterns.", len(self.desired_policies))
 
         self._get_current_policies_from_db()
-        logger.info(f"💾 Found {len(self.current_db_policies)} existing policies in the database.")
+        logger.info("💾 Found %d existing policies in the database.", len(self.current_db_policies))
 
         to_create, to_delete, to_update = self._calculate_policy_changes()
-        logger.info(f"➕ Policies to create: {len(to_create)}")
-        logger.info(f"➖ Policies to delete: {len(to_delete)}")
-        logger.info(f"🔧 Policies to update: {len(to_update)}")
+        logger.info("➕ Policies to create: %d", len(to_create))
+        logger.info("➖ Policies to delete: %d", len(to_delete))
+        logger.info("🔧 Policies to update: %d", len(to_update))
+
+        if not (to_create or to_delete or to_update):
+            logger.info("✅ Policies already up to date; nothing to apply.")
+            return
 
         self._apply_policy_changes(to_create, to_delete, to_update)
         logger.info("🎉 Successfully finished permission synchronization.")
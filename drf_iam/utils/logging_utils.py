@@ -22,24 +22,39 @@ LOG_LEVEL_COLORS = {
 class ColorfulFormatter(logging.Formatter):
     def __init__(self, datefmt='%H:%M:%S'):
         super().__init__(datefmt=datefmt)
+        # Colored fragments are built once per level / logger name and reused
+        self._level_fragments = {}
+        self._name_fragments = {}
+
+    def _get_level_fragments(self, record):
+        fragments = self._level_fragments.get(record.levelno)
+        if fragments is None:
+            level_color = LOG_LEVEL_COLORS.get(record.levelno, Colors.RESET)
+
+            msg_body_color = Colors.WHITE # Default for message body
+            if record.levelno == logging.INFO:
+                msg_body_color = Colors.GREEN
+            elif record.levelno == logging.DEBUG:
+                msg_body_color = Colors.BLUE
+            elif record.levelno >= logging.WARNING:
+                msg_body_color = level_color # Errors, Warnings use their level's color for message body
+
+            levelname_str = f"{level_color}{record.levelname.center(8)}{Colors.RESET}" # Padded levelname
+            fragments = (levelname_str, msg_body_color)
+            self._level_fragments[record.levelno] = fragments
+        return fragments
 
     def format(self, record):
-        level_color = LOG_LEVEL_COLORS.get(record.levelno, Colors.RESET)
-        
-        msg_body_color = Colors.WHITE # Default for message body
-        if record.levelno == logging.INFO:
-            msg_body_color = Colors.GREEN 
-        elif record.levelno == logging.DEBUG:
-            msg_body_color = Colors.BLUE
-        elif record.levelno >= logging.WARNING:
-            msg_body_color = level_color # Errors, Warnings use their level's color for message body
-
-        asctime_str = f"{Colors.CYAN}{self.formatTime(record, self.datefmt)}{Colors.RESET}"
-        name_str = f"{Colors.MAGENTA}[{record.name}]{Colors.RESET}"
-        levelname_str = f"{level_color}{record.levelname.center(8)}{Colors.RESET}" # Padded levelname
-        message_str = f"{msg_body_color}{record.getMessage()}{Colors.RESET}"
-        
-        return f"{asctime_str} {name_str} {levelname_str} : {message_str}"
+        levelname_str, msg_body_color = self._get_level_fragments(record)
+
+        name_str = self._name_fragments.get(record.name)
+        if name_str is None:
+            name_str = self._name_fragments[record.name] = f"{Colors.MAGENTA}[{record.name}]{Colors.RESET}"
+
+        return (
+            f"{Colors.CYAN}{self.formatTime(record, self.datefmt)}{Colors.RESET} {name_str} {levelname_str} : "
+            f"{msg_body_color}{record.getMessage()}{Colors.RESET}"
+        )
 
 def setup_colorful_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """Sets up and returns a logger instance with colorful formatting."""